@@ -72,6 +72,8 @@ def freeze_graph_with_def_protos(
           layout_optimizer=rewriter_config_pb2.RewriterConfig.ON)
       rewrite_options.optimizers.append('pruning')
       rewrite_options.optimizers.append('constfold')
+      rewrite_options.optimizers.append('arithmetic')
+      rewrite_options.optimizers.append('remap')
       rewrite_options.optimizers.append('layout')
       graph_options = tf.GraphOptions(
           rewrite_options=rewrite_options, infer_shapes=True)
@@ -177,9 +179,11 @@ def _encoded_image_string_tensor_input_placeholder():
       shape=[None],
       name='encoded_image_string_tensor')
   def decode(encoded_image_string_tensor):
-    image_tensor = tf.image.decode_image(encoded_image_string_tensor,
-                                         channels=3)
-    image_tensor.set_shape((None, None, 3))
+    # decode_jpeg shares its kernel with decode_png and dispatches on the
+    # image header, so PNG strings are still handled. Unlike decode_image it
+    # avoids a per-element format cond and has a static [None, None, 3] shape.
+    image_tensor = tf.image.decode_jpeg(encoded_image_string_tensor,
+                                        channels=3)
     return image_tensor
   return (batch_image_str_placeholder,
           tf.map_fn(
@@ -308,15 +312,18 @@ def _write_saved_model(saved_model_path,
 
 def _write_graph_and_checkpoint(inference_graph_def,
                                 model_path,
-                                input_saver_def,
+                                saver,
                                 trained_checkpoint_prefix):
+  """Writes the inference graph and a checkpoint derived from it.
+
+  Reuses the export-level `saver`: its save/restore ops are resolved by name
+  in the imported graph, so no second Saver has to be constructed here.
+  """
   for node in inference_graph_def.node:
     node.device = ''
   with tf.Graph().as_default():
     tf.import_graph_def(inference_graph_def, name='')
     with session.Session() as sess:
-      saver = saver_lib.Saver(saver_def=input_saver_def,
-                              save_relative_paths=True)
       saver.restore(sess, trained_checkpoint_prefix)
       saver.save(sess, model_path)
 
@@ -365,13 +372,13 @@ def _export_inference_graph(input_type,
   else:
     checkpoint_to_use = trained_checkpoint_prefix
 
-  saver = tf.train.Saver()
+  saver = tf.train.Saver(save_relative_paths=True)
   input_saver_def = saver.as_saver_def()
 
   _write_graph_and_checkpoint(
       inference_graph_def=tf.get_default_graph().as_graph_def(),
       model_path=model_path,
-      input_saver_def=input_saver_def,
+      saver=saver,
       trained_checkpoint_prefix=checkpoint_to_use)
 
   if additional_output_tensor_names is not None:
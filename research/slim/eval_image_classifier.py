@@ -21,6 +21,8 @@ from __future__ import print_function
 import math
 import tensorflow as tf
 
+from tensorflow.python.client import device_lib
+
 from datasets import dataset_factory
 from nets import nets_factory
 from preprocessing import preprocessing_factory
@@ -47,7 +49,22 @@ tf.app.flags.DEFINE_string(
 
 tf.app.flags.DEFINE_integer(
     'num_preprocessing_threads', 4,
-    'The number of threads used to create the batches.')
+    'The number of parallel calls used to preprocess the dataset.')
+
+tf.app.flags.DEFINE_bool(
+    'use_fused_jpeg_decode', False,
+    'Pass the raw encoded image to the preprocessing function so JPEG '
+    'decoding can be fused with the central crop. Requires JPEG-encoded '
+    'records and a preprocessing method that accepts encoded strings '
+    '(the inception family).')
+
+tf.app.flags.DEFINE_string(
+    'preprocessed_data_cache', None,
+    'File prefix used to cache the preprocessed dataset on disk. The first '
+    'evaluation populates the cache; later evaluations with the same '
+    'preprocessing settings reuse it and skip decoding and preprocessing. '
+    'The cache stores batched elements and is keyed by --batch_size; delete '
+    'the cache files when changing the dataset or preprocessing.')
 
 tf.app.flags.DEFINE_string(
     'dataset_name', 'imagenet', 'The name of the dataset to load.')
@@ -79,6 +96,14 @@ tf.app.flags.DEFINE_float(
 tf.app.flags.DEFINE_integer(
     'eval_image_size', None, 'Eval image size')
 
+tf.app.flags.DEFINE_bool(
+    'quantize', False, 'whether to use quantized graph or not.')
+
+tf.app.flags.DEFINE_bool(
+    'use_xla', False,
+    'Whether to compile the eval graph with XLA JIT. Requires a TensorFlow '
+    'build with XLA support.')
+
 FLAGS = tf.app.flags.FLAGS
 
 
@@ -104,17 +129,6 @@ def main(_):
         num_classes=(dataset.num_classes - FLAGS.labels_offset),
         is_training=False)
 
-    ##############################################################
-    # Create a dataset provider that loads data from the dataset #
-    ##############################################################
-    provider = slim.dataset_data_provider.DatasetDataProvider(
-        dataset,
-        shuffle=False,
-        common_queue_capacity=2 * FLAGS.batch_size,
-        common_queue_min=FLAGS.batch_size)
-    [image, label] = provider.get(['image', 'label'])
-    label -= FLAGS.labels_offset
-
     #####################################
     # Select the preprocessing function #
     #####################################
@@ -125,18 +139,92 @@ def main(_):
 
     eval_image_size = FLAGS.eval_image_size or network_fn.default_image_size
 
-    image = image_preprocessing_fn(image, eval_image_size, eval_image_size)
-
-    images, labels = tf.train.batch(
-        [image, label],
-        batch_size=FLAGS.batch_size,
-        num_threads=FLAGS.num_preprocessing_threads,
-        capacity=5 * FLAGS.batch_size)
+    ##############################################################
+    # Create a tf.data pipeline that loads data from the dataset #
+    ##############################################################
+    def _parse_and_preprocess(example_proto):
+      """Decodes a serialized tf.Example and preprocesses the image."""
+      if FLAGS.use_fused_jpeg_decode:
+        features = tf.parse_single_example(
+            example_proto,
+            {
+                'image/encoded':
+                    tf.FixedLenFeature((), tf.string, default_value=''),
+                'image/class/label':
+                    tf.FixedLenFeature([], tf.int64, default_value=-1),
+            })
+        # The encoded JPEG string is handed to the preprocessing function,
+        # which fuses decoding with its central crop.
+        image = features['image/encoded']
+        label = features['image/class/label']
+      else:
+        [image, label] = dataset.decoder.decode(example_proto,
+                                                ['image', 'label'])
+      image = image_preprocessing_fn(image, eval_image_size, eval_image_size)
+      label -= FLAGS.labels_offset
+      return image, label
+
+    # Soft placement lets the '/gpu:0' pins below fall back to the CPU on
+    # machines without a GPU.
+    session_config = tf.ConfigProto(allow_soft_placement=True)
+    session_config.gpu_options.allow_growth = True
+    if FLAGS.use_xla:
+      session_config.graph_options.optimizer_options.global_jit_level = (
+          tf.OptimizerOptions.ON_1)
+
+    # Keep the input pipeline on the CPU so preprocessing does not steal
+    # cycles from, or bounce image buffers through, the accelerator.
+    with tf.device('/cpu:0'):
+      files = tf.data.Dataset.list_files(dataset.data_sources, shuffle=False)
+      ds = files.interleave(
+          lambda filename: tf.data.TFRecordDataset(
+              filename, buffer_size=8 << 20),
+          cycle_length=FLAGS.num_preprocessing_threads,
+          num_parallel_calls=tf.data.experimental.AUTOTUNE)
+      ds = ds.apply(
+          tf.data.experimental.map_and_batch(
+              _parse_and_preprocess,
+              batch_size=FLAGS.batch_size,
+              num_parallel_calls=FLAGS.num_preprocessing_threads))
+      if FLAGS.preprocessed_data_cache:
+        # The cache holds batched elements, so key the file name by batch
+        # size: re-reading a cache written with a different batch size would
+        # silently evaluate the wrong number of examples.
+        ds = ds.cache('%s_bs%d' % (FLAGS.preprocessed_data_cache,
+                                   FLAGS.batch_size))
+      ds = ds.prefetch(tf.data.experimental.AUTOTUNE)
+
+      # Element order does not matter for streaming metrics, so allow the
+      # pipeline to produce batches as they become ready and enable the static
+      # graph optimizations.
+      options = tf.data.Options()
+      options.experimental_deterministic = False
+      options.experimental_optimization.map_and_batch_fusion = True
+      options.experimental_optimization.map_parallelization = True
+      options.experimental_optimization.noop_elimination = True
+      options.experimental_threading.private_threadpool_size = (
+          FLAGS.num_preprocessing_threads)
+      ds = ds.with_options(options)
+
+    # Probe for GPUs with the allow_growth config: tf.test.is_gpu_available()
+    # would instantiate the process-global GPU allocators with a default
+    # config and pre-reserve all GPU memory.
+    if any(device.device_type == 'GPU'
+           for device in device_lib.list_local_devices(session_config)):
+      # Stage batches into GPU memory so the host-to-device copy overlaps
+      # with the previous model step.
+      ds = ds.apply(
+          tf.data.experimental.prefetch_to_device('/gpu:0', buffer_size=2))
+    images, labels = ds.make_one_shot_iterator().get_next()
 
     ####################
     # Define the model #
     ####################
-    logits, _ = network_fn(images)
+    with tf.device('/gpu:0'):
+      logits, _ = network_fn(images)
+
+    if FLAGS.quantize:
+      tf.contrib.quantize.create_eval_graph()
 
     if FLAGS.moving_average_decay:
       variable_averages = tf.train.ExponentialMovingAverage(
@@ -148,7 +236,6 @@ def main(_):
       variables_to_restore = slim.get_variables_to_restore()
 
     predictions = tf.argmax(logits, 1)
-    labels = tf.squeeze(labels)
 
     # Define the metrics:
     names_to_values, names_to_updates = slim.metrics.aggregate_metric_map({
@@ -184,7 +271,8 @@ def main(_):
         logdir=FLAGS.eval_dir,
         num_evals=num_batches,
         eval_op=list(names_to_updates.values()),
-        variables_to_restore=variables_to_restore)
+        variables_to_restore=variables_to_restore,
+        session_config=session_config)
 
 
 if __name__ == '__main__':
@@ -251,10 +251,12 @@ def preprocess_for_eval(image, height, width,
   input image.
 
   Args:
-    image: 3-D Tensor of image. If dtype is tf.float32 then the range should be
-      [0, 1], otherwise it would converted to tf.float32 assuming that the range
-      is [0, MAX], where MAX is largest positive representable number for
-      int(8/16/32) data type (see `tf.image.convert_image_dtype` for details).
+    image: 3-D Tensor of image, or 0-D Tensor of type tf.string holding an
+      encoded JPEG image, in which case decoding is fused with the central
+      crop. If dtype is tf.float32 then the range should be [0, 1], otherwise
+      it would converted to tf.float32 assuming that the range is [0, MAX],
+      where MAX is largest positive representable number for int(8/16/32) data
+      type (see `tf.image.convert_image_dtype` for details).
     height: integer
     width: integer
     central_fraction: Optional Float, fraction of the image to crop.
@@ -263,21 +265,66 @@ def preprocess_for_eval(image, height, width,
     3-D float Tensor of prepared image.
   """
   with tf.name_scope(scope, 'eval_image', [image, height, width]):
-    if image.dtype != tf.float32:
+    if image.dtype == tf.string:
+      # The image is an encoded JPEG string. Fuse the decode with the central
+      # crop so only the cropped region is entropy-decoded.
+      if central_fraction:
+        image_shape = tf.image.extract_jpeg_shape(image)
+        offset_fraction = (1.0 - central_fraction) / 2.0
+        crop_y = tf.cast(
+            tf.cast(image_shape[0], tf.float32) * offset_fraction, tf.int32)
+        crop_x = tf.cast(
+            tf.cast(image_shape[1], tf.float32) * offset_fraction, tf.int32)
+        image = tf.image.decode_and_crop_jpeg(
+            image,
+            tf.stack([crop_y, crop_x,
+                      image_shape[0] - 2 * crop_y,
+                      image_shape[1] - 2 * crop_x]),
+            channels=3)
+        # The central crop has already been applied at decode time.
+        central_fraction = None
+      else:
+        image = tf.image.decode_jpeg(image, channels=3)
+    if image.dtype == tf.uint8:
+      image = tf.cast(image, tf.float32) * (1.0 / 255.0)
+    elif image.dtype != tf.float32:
       image = tf.image.convert_image_dtype(image, dtype=tf.float32)
-    # Crop the central region of the image with an area containing 87.5% of
-    # the original image.
-    if central_fraction:
-      image = tf.image.central_crop(image, central_fraction=central_fraction)
-
-    if height and width:
-      # Resize the image to the specified height and width.
-      image = tf.expand_dims(image, 0)
-      image = tf.image.resize_bilinear(image, [height, width],
-                                       align_corners=False)
+    if central_fraction and height and width:
+      # Crop the central region of the image and resize it to the specified
+      # height and width in a single fused kernel.
+      offset = (1.0 - central_fraction) / 2.0
+      image = tf.image.crop_and_resize(
+          tf.expand_dims(image, 0),
+          boxes=[[offset, offset, 1.0 - offset, 1.0 - offset]],
+          box_ind=[0],
+          crop_size=[height, width])
       image = tf.squeeze(image, [0])
-    image = tf.subtract(image, 0.5)
-    image = tf.multiply(image, 2.0)
+    else:
+      # Crop the central region of the image with an area containing 87.5% of
+      # the original image.
+      if central_fraction:
+        static_shape = image.get_shape().as_list()
+        if len(static_shape) == 3 and None not in static_shape[:2]:
+          # The image shape is known at graph construction time, so bake the
+          # crop offsets in as constants instead of deriving them from shape
+          # ops at run time.
+          offset_y = int(static_shape[0] * (1.0 - central_fraction) / 2.0)
+          offset_x = int(static_shape[1] * (1.0 - central_fraction) / 2.0)
+          image = tf.image.crop_to_bounding_box(
+              image, offset_y, offset_x,
+              static_shape[0] - 2 * offset_y,
+              static_shape[1] - 2 * offset_x)
+        else:
+          image = tf.image.central_crop(image,
+                                        central_fraction=central_fraction)
+
+      if height and width:
+        # Resize the image to the specified height and width.
+        image = tf.expand_dims(image, 0)
+        image = tf.image.resize_bilinear(image, [height, width],
+                                         align_corners=False)
+        image = tf.squeeze(image, [0])
+    image = image * 2.0 - 1.0
     return image
 
 